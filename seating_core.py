@@ -0,0 +1,325 @@
+import pandas as pd
+import numpy as np
+import io
+import heapq
+from collections import defaultdict
+from itertools import groupby
+from operator import itemgetter
+
+# -----------------------------
+# Guest-list columns
+# -----------------------------
+MEAL_COL = "meal"
+BABY_COL = "baby chair"
+CARPARK_COL = "do you need a car park coupon? 您需要停车券吗？"
+OTHER_REQ_COL = (
+    "if you have any other comments or requests not mentioned above, "
+    "feel free to leave them here. 如果您有其他未提及的备注或需求，也欢迎在此填写."
+)
+COMMENTS_COL = "comments"
+
+# Use Arrow-backed strings when pyarrow is installed (Streamlit ships it),
+# so .str ops run as Arrow kernels
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = "string[pyarrow]"
+except ImportError:
+    STRING_DTYPE = "string"
+
+# Declared up front so read_csv skips type inference on the text columns.
+# Low-cardinality answers are read as categories (cast to STRING_DTYPE before
+# filling blanks, since a categorical cannot take a new "" value).
+DTYPES = {
+    "first name": STRING_DTYPE,
+    "last name": STRING_DTYPE,
+    "tags": "category",
+    "party": "category",
+    "rsvp": "category",
+    MEAL_COL: "category",
+    BABY_COL: "category",
+    CARPARK_COL: "category",
+    OTHER_REQ_COL: STRING_DTYPE,
+    COMMENTS_COL: STRING_DTYPE,
+}
+
+# Deletes every Unicode whitespace character (same set as regex \s)
+_STRIP_WHITESPACE = str.maketrans(
+    "", "", "".join(c for c in map(chr, range(0x3001)) if c.isspace())
+)
+
+# -----------------------------
+# Helper: transform each distinct value once
+# -----------------------------
+def per_category(series, transform, missing):
+    # transform gets the categories as strings; results are broadcast by code,
+    # and missing values (code -1) pick the trailing `missing` entry
+    s = series.astype("category")
+    values = np.append(transform(s.cat.categories.astype(STRING_DTYPE)), missing)
+    return values[s.cat.codes.to_numpy()]
+
+
+def rsvp_state(values):
+    # 0 = pending (blank), 1 = declined, 2 = attending
+    values = values.str.strip().str.lower()
+    return np.where(values == "", 0, np.where(values.str.startswith("regretfully"), 1, 2))
+
+
+def tag_group_key(values):
+    return values.str.translate(_STRIP_WHITESPACE).str.lower()
+
+
+# -----------------------------
+# Helper: clean "No"
+# -----------------------------
+def clean_no(series):
+    # Low-cardinality answers: the match runs once per distinct value and the
+    # result stays categorical; a missing answer is blanked like a "No"
+    cleaned = per_category(
+        series, lambda v: v.where(~v.str.contains("no", case=False), ""), missing=""
+    )
+    return pd.Series(cleaned, index=series.index, dtype="category")
+
+
+# -----------------------------
+# Helper: read the guest-list CSV
+# -----------------------------
+def read_guest_list(source):
+    # All columns are kept: Pending_RSVP / Declined export every field.
+    # Text columns not in DTYPES (email, address, ...) that were inferred as
+    # object also get STRING_DTYPE; pandas 3 already infers Arrow strings.
+    # The C engine is kept for uploads: it pads short rows, dedupes and names
+    # blank headers, and reads category columns as strings
+    df = pd.read_csv(source, dtype=DTYPES, engine="c")
+    text_cols = df.columns[df.dtypes == object]
+    return df.astype(dict.fromkeys(text_cols, STRING_DTYPE))
+
+
+# -----------------------------
+# Helpers: write sheets row by row
+# -----------------------------
+def sheet_rows(sheet_df):
+    # Blank out missing values; xlsxwriter cannot write NaN/NA
+    return list(sheet_df.astype(object).fillna("").itertuples(index=False, name=None))
+
+
+def write_sheet(book, name, columns, rows, header_fmt):
+    ws = book.add_worksheet(name)
+    ws.write_row(0, 0, list(columns), header_fmt)
+    for r, row in enumerate(rows, start=1):
+        ws.write_row(r, 0, row)
+
+
+# -----------------------------
+# Core Seating Plan Generator
+# -----------------------------
+def generate_seating_plan(df, table_size=10):
+
+    # Work on a shallow copy so the caller's (possibly cached) frame is untouched
+    df = df.copy(deep=False)
+
+    # --- CLEAN COLUMN NAMES ---
+    df.columns = df.columns.str.strip()
+
+    # --- COMBINE NAME ---
+    df["full_name"] = (
+        df["first name"].fillna("") + " " + df["last name"].fillna("")
+    ).str.strip()
+
+    # --- RSVP FILTERING ---
+    # rsvp/tags are low-cardinality: normalize the distinct values only
+    state = per_category(df["rsvp"], rsvp_state, missing=0)
+
+    attending = df[state == 2].copy()
+    pending = df[state == 0].copy()
+    declined = df[state == 1].copy()
+
+    # --- TAG CLEANING ---
+    tag_norm = pd.Series(
+        per_category(attending["tags"], tag_group_key, missing=""),
+        index=attending.index
+    )
+
+    no_tag_mask = tag_norm.isin(["", "nan", "none"])
+    pending_tags = attending[no_tag_mask].copy()
+    attending = attending[~no_tag_mask].copy()
+    tag_norm = tag_norm[~no_tag_mask]
+
+    # Ordered categorical: tables are numbered in sorted tag-group order
+    tag_groups = sorted(tag_norm.unique())
+    attending["tag_group"] = pd.Categorical(tag_norm, categories=tag_groups, ordered=True)
+
+    # -----------------------------
+    # TABLE ASSIGNMENT
+    # -----------------------------
+    tbls = np.zeros(len(attending), dtype=np.int32)
+    next_table_number = 1
+
+    # Packing works on row positions: tables are lists of positions into tbls.
+    # One pass buckets every guest by tag group, then by party; a blank or
+    # missing party means a single guest.
+    tag_codes = attending["tag_group"].cat.codes.to_numpy()
+    party_all = attending["party"].astype(STRING_DTYPE).fillna("").str.strip()
+    parties_by_tag = defaultdict(lambda: defaultdict(list))
+    singles_by_tag = defaultdict(list)
+    for pos, (code, party) in enumerate(zip(tag_codes.tolist(), party_all.tolist())):
+        if party:
+            parties_by_tag[code][party].append(pos)
+        else:
+            singles_by_tag[code].append(pos)
+
+    group_sizes = np.bincount(tag_codes, minlength=len(attending["tag_group"].cat.categories))
+
+    for code, group_size in enumerate(group_sizes.tolist()):
+
+        # Allow 11-seater only if exactly 11 guests
+        local_cap = table_size + 1 if group_size == table_size + 1 else table_size
+
+        # Parties first, largest first (best fit decreasing), then singles
+        party_members = sorted(parties_by_tag[code].values(), key=len, reverse=True)
+        singles_pos = singles_by_tag[code]
+
+        tables_for_tag = []
+        remaining = []  # free seats per table
+        # tables_by_free[k]: min-heap of tables with exactly k free seats
+        tables_by_free = [[] for _ in range(local_cap + 1)]
+
+        for members in party_members:
+            size = len(members)
+            # Best fit: the fullest table that still has room for the party
+            free = next(
+                (k for k in range(size, local_cap + 1) if tables_by_free[k]), None
+            )
+            if free is None:
+                t = len(tables_for_tag)
+                tables_for_tag.append(members)
+                remaining.append(local_cap - size)
+            else:
+                t = heapq.heappop(tables_by_free[free])
+                tables_for_tag[t].extend(members)
+                remaining[t] -= size
+            if remaining[t] > 0:
+                heapq.heappush(tables_by_free[remaining[t]], t)
+
+        # Singles: seats only ever fill up, so the first open table moves forward
+        first_open = 0
+        for pos in singles_pos:
+            while first_open < len(tables_for_tag) and remaining[first_open] <= 0:
+                first_open += 1
+            if first_open == len(tables_for_tag):
+                tables_for_tag.append([pos])
+                remaining.append(local_cap - 1)
+            else:
+                tables_for_tag[first_open].append(pos)
+                remaining[first_open] -= 1
+
+        # Assign table numbers
+        for tbl in tables_for_tag:
+            tbls[tbl] = next_table_number
+            next_table_number += 1
+
+    # -----------------------------
+    # FINALIZE TABLE NUMBERS
+    # -----------------------------
+    # Every attending guest is placed as a party member or single; table
+    # numbers are stored as int16 unless there are more tables than it holds
+    if next_table_number <= np.iinfo(np.int16).max:
+        attending["table"] = tbls.astype(np.int16)
+    else:
+        attending["table"] = tbls
+
+    # -----------------------------
+    # PREPARE EXCEL EXPORT COLUMNS
+    # -----------------------------
+    # Combine remarks: "other requests | comments", skipping blanks; both
+    # free-text columns are optional in the guest list
+    remark_cols = attending.reindex(columns=[OTHER_REQ_COL, COMMENTS_COL], fill_value="")
+    other_req = remark_cols[OTHER_REQ_COL].astype(STRING_DTYPE).fillna("").str.strip()
+    comments = remark_cols[COMMENTS_COL].astype(STRING_DTYPE).fillna("").str.strip()
+    both = (other_req != "") & (comments != "")
+    attending["remarks"] = np.where(both, other_req + " | " + comments, other_req + comments)
+
+    # Clean NO Values
+    for col in [MEAL_COL, BABY_COL, CARPARK_COL]:
+        attending[col] = clean_no(attending[col])
+
+    # -----------------------------
+    # BUILD VERTICAL SEATING PLAN
+    # -----------------------------
+    all_rows = []
+    max_rows = table_size
+
+    columns_main = [
+        "Table", "Name", "Meal preference", "Baby chair",
+        "Car park coupon", "Remarks", "Tags"
+    ]
+    subheader_row = ("",) + tuple(columns_main[1:])
+    pad_row = ("",) * 6
+    empty_pad = [pad_row] * max_rows
+    sep_row = ("",) * 7
+    # Row-number cells, long enough for the largest (possibly 11-seat) table
+    largest_table = int(np.bincount(tbls).max()) if len(tbls) else 0
+    row_labels = [(str(i),) for i in range(1, max(max_rows, largest_table) + 1)]
+
+    # A table never mixes tag groups, so tag_group adds nothing to the sort;
+    # party is categorical (DTYPES), so it compares as integer codes
+    att_sorted = attending.sort_values(["table", "party", "full_name"])[
+        ["table", "full_name", MEAL_COL, BABY_COL, CARPARK_COL, "remarks", "tags"]
+    ].fillna("")
+
+    # One pass over the sorted rows; consecutive rows share a table
+    guest_rows = att_sorted.itertuples(index=False, name=None)
+    for tid, table_rows in groupby(guest_rows, key=itemgetter(0)):
+        tid = int(tid)
+
+        # Header
+        all_rows.append((f"Table #{tid}",) + pad_row)
+
+        # Subheader
+        all_rows.append(subheader_row)
+
+        # Guest rows
+        guests = [row[1:] for row in table_rows]
+
+        # Pad
+        if len(guests) < max_rows:
+            guests += empty_pad[:max_rows - len(guests)]
+
+        # Insert row numbers
+        all_rows.extend(label + guest for label, guest in zip(row_labels, guests))
+
+        # Separator
+        all_rows.append(sep_row)
+
+    seating_plan = pd.DataFrame(all_rows, columns=columns_main)
+
+    # -----------------------------
+    # BUILD EXCEL OUTPUT
+    # -----------------------------
+    # constant_memory flushes each row as soon as the next one starts, so
+    # every sheet is written strictly row by row (to_excel writes by column)
+    extra_sheets = [
+        ("Pending_RSVP", pending),
+        ("Declined", declined),
+        ("Pending_Tags", pending_tags),
+    ]
+    buffer = io.BytesIO()
+
+    # in_memory is deliberately not set: xlsxwriter lets it override
+    # constant_memory. Guest text is always written as plain strings.
+    options = {
+        "constant_memory": True,
+        "strings_to_urls": False,
+        "strings_to_formulas": False,
+        "strings_to_numbers": False,
+    }
+    with pd.ExcelWriter(
+        buffer, engine="xlsxwriter", engine_kwargs={"options": options}
+    ) as writer:
+        header_fmt = writer.book.add_format(
+            {"bold": True, "border": 1, "align": "center", "valign": "top"}
+        )
+        write_sheet(writer.book, "SeatingPlan", columns_main, all_rows, header_fmt)
+        for name, sheet_df in extra_sheets:
+            write_sheet(writer.book, name, sheet_df.columns, sheet_rows(sheet_df), header_fmt)
+
+    return buffer.getvalue(), attending, seating_plan